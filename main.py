@@ -3,50 +3,60 @@
 
 import logging
 import argparse
+import sys
+from types import SimpleNamespace
+from typing import List, Optional
 
 from src.nfc.exceptions import TagLockedException, WriteError
-from src.nfc.reader import NFCReader
 from src.nft.data import NFTData
-from src.utils.logging import setup_logging
-from src.utils.csv_handler import CSVHandler
+from src.utils.logging import flush_log_file, setup_logging
+from src.utils.csv_handler import CSV_BUFFER_SIZE, CSVHandler, load_uids, read_columns
 import os
 import csv
 
+# Operator prompts shown while waiting for a tag
+TAG_PROMPT = "Waiting for tag... Please touch an NFC tag to the reader then press enter or (q) to quit."
+BATCH_TAG_PROMPT = "\nPlace tag on reader and press Enter (or 'q' to quit)..."
+SCAN_TAG_PROMPT = "Place NFC tag on reader and press Enter to scan (or 'q' to quit)..."
+INFO_TAG_PROMPT = "\nPlace tag on reader and press Enter..."
+
+
+def _prompt_for_tag(prompt: str = TAG_PROMPT) -> bool:
+    """Prompt the operator to present a tag. Returns False if they chose to quit."""
+    logging.info(prompt)
+    # Idle until the operator responds, so persist what has been written and locked so far
+    flush_log_file()
+    return input().lower() != 'q'
+
 
 def handle_nfc_operation(args):
     """Handle NFC read/write operations."""
+    from src.nfc.reader import NFCReader
+
     reader = NFCReader()
     if not reader.connect():
         return
 
     try:
         if args.command == 'read':
+            if not _prompt_for_tag():
+                return
             if args.uid:
-                logging.info("Waiting for tag... Please touch an NFC tag to the reader then press enter or (q) to quit.")
-                user_input = input()
-                if user_input.lower() == 'q':
-                    return
                 data = reader.read_tag_uid()
                 if data:
-                    logging.info(f"UID: {data}")
+                    logging.info("UID: %s", data)
             else:
-                logging.info("Waiting for tag... Please touch an NFC tag to the reader then press enter or (q) to quit.")
-                user_input = input()
-                if user_input.lower() == 'q':
-                    return
                 tag_type = reader.get_tag_type()
                 print(f"Tag Type: {tag_type}")
                 if tag_type:
                     data = reader.read_data()
                     if data:
-                        logging.info(f"Version: {data['version']}")
-                        logging.info(f"NFT ID: {data['nft_id']}")
-                        logging.info(f"Offer: {data['offer']}")
+                        logging.info("Version: %s", data['version'])
+                        logging.info("NFT ID: %s", data['nft_id'])
+                        logging.info("Offer: %s", data['offer'])
 
         elif args.command == 'write':
-            logging.info("Waiting for tag... Please touch an NFC tag to the reader then press enter or (q) to quit.")
-            user_input = input()
-            if user_input.lower() == 'q':
+            if not _prompt_for_tag():
                 return
             tag_type = reader.get_tag_type()
             if tag_type:
@@ -66,23 +76,29 @@ def handle_nfc_operation(args):
         reader.close()
 
 
-def validate_nft_data(data: dict, legacy: bool = False, strict: bool = True) -> bool:
-    """Validate NFT data structure and contents."""
-    try:
-        nft_data = NFTData(
-            version=data['version'],
-            nft_id=data['nft_id'],
-            offer=data['offer']
-        )
-        nft_data.validate_offer_length(strict=strict, legacy=legacy)
-        return True
-    except ValueError as e:
-        logging.error(f"Invalid NFT data: {e}")
-        return False
+def prevalidate_records(records: list, legacy: bool = False, strict: bool = True) -> Optional[List[NFTData]]:
+    """Validate NFT data for all records, returning the validated objects in record order."""
+    validated = []
+    for record in records:
+        try:
+            nft_data = NFTData(
+                version=record['version'],
+                nft_id=record['nft_id'],
+                offer=record['offer']
+            )
+            nft_data.validate_offer_length(strict=strict, legacy=legacy)
+        except ValueError as e:
+            logging.error("Invalid NFT data: %s", e)
+            return None
+        validated.append(nft_data)
+    return validated
 
 
 def handle_batch_operation(args):
     """Handle batch processing from CSV file."""
+    from src.nfc.reader import NFCReader
+    from src.nfc.ndef_utils import build_ndef_tlv
+
     reader = NFCReader()
     if not reader.connect():
         return
@@ -96,14 +112,28 @@ def handle_batch_operation(args):
             return
 
         # Validate all records first
+        if prevalidate_records(records,
+                               legacy=args.legacy_offer,
+                               strict=not args.allow_any_length) is None:
+            logging.error("Validation failed - check offer code lengths")
+            return
+
+        # Index the record fields to write and their pre-built NDEF bytes by
+        # normalized UID (first occurrence wins), keeping encoding off the
+        # per-tag path. The raw fields are written, so an empty version stays
+        # empty rather than becoming NFTData's default.
+        uid_index = {}
         for record in records:
-            if not validate_nft_data(record,
-                                     legacy=args.legacy_offer,
-                                     strict=not args.allow_any_length):
-                logging.error("Validation failed - check offer code lengths")
-                return
+            uid = record['uid'].strip().upper()
+            if uid not in uid_index:
+                nft_data = {
+                    'version': record['version'],
+                    'nft_id': record['nft_id'],
+                    'offer': record['offer']
+                }
+                uid_index[uid] = (nft_data, build_ndef_tlv(nft_data))
 
-        logging.info(f"Processing NFC Writes: {len(records)} to be written")
+        logging.info("Processing NFC Writes: %s to be written", len(records))
 
         # Track success/failure counts
         total = len(records)
@@ -130,53 +160,39 @@ def handle_batch_operation(args):
         processed_uids = set()
 
         while len(processed_uids) < total:
-            logging.info("\nPlace tag on reader and press Enter (or 'q' to quit)...")
-            user_input = input()
-            if user_input.lower() == 'q':
+            if not _prompt_for_tag(BATCH_TAG_PROMPT):
                 break
 
-            uid = reader.read_tag_uid()
-            if not uid:
+            # Reader UIDs are already canonical (uppercase, space-separated hex)
+            scanned_uid = reader.read_tag_uid()
+            if not scanned_uid:
                 continue
 
-            # Normalize scanned UID
-            scanned_uid = uid.strip().upper()
-
             # Find matching record
-            matching_record = None
-            for record in records:
-                expected_uid = record['uid'].strip().upper()
-                if scanned_uid == expected_uid:
-                    matching_record = record
-                    break
-
-            if not matching_record:
-                logging.error(f"No matching UID found in records: {scanned_uid}")
+            matching = uid_index.get(scanned_uid)
+            if matching is None:
+                logging.error("No matching UID found in records: %s", scanned_uid)
                 continue
 
             if scanned_uid in processed_uids:
-                logging.error(f"This tag has already been processed: {scanned_uid}")
+                logging.error("This tag has already been processed: %s", scanned_uid)
                 continue
 
             try:
                 # Write data
-                nft_data = {
-                    'version': matching_record['version'],
-                    'nft_id': matching_record['nft_id'],
-                    'offer': matching_record['offer']
-                }
-                logging.info(f"\nWriting to tag {scanned_uid}:")
+                nft_data, tlv_data = matching
+                logging.info("\nWriting to tag %s:", scanned_uid)
                 for key, value in nft_data.items():
-                    logging.info(f"    {key.title()}: {value}")
+                    logging.info("    %s: %s", key.title(), value)
 
-                if reader.write_data(nft_data, lock=lock_choice == 'yes'):
+                if reader.write_data(nft_data, lock=lock_choice == 'yes', tlv_data=tlv_data):
                     success_count += 1
                     processed_uids.add(scanned_uid)
-                    logging.info(f"Success ({success_count}/{total}, {fail_count} failed)")
+                    logging.info("Success (%s/%s, %s failed)", success_count, total, fail_count)
                 else:
                     fail_count += 1
                     processed_uids.add(scanned_uid)
-                    logging.error(f"Write failed ({success_count}/{total}, {fail_count} failed)")
+                    logging.error("Write failed (%s/%s, %s failed)", success_count, total, fail_count)
 
             except TagLockedException:
                 logging.error("Tag is locked - cannot write")
@@ -189,10 +205,10 @@ def handle_batch_operation(args):
                 if action == 's':
                     fail_count += 1
                     processed_uids.add(scanned_uid)
-                    logging.info(f"Skipped ({success_count}/{total}, {fail_count} failed)")
+                    logging.info("Skipped (%s/%s, %s failed)", success_count, total, fail_count)
 
             except WriteError as e:
-                logging.error(f"\nWrite failed: {str(e)}")
+                logging.error("\nWrite failed: %s", e)
                 while True:
                     action = input("Choose action (r)etry/(s)kip/(q)uit: ").lower()
                     if action in ['r', 's', 'q']:
@@ -202,11 +218,11 @@ def handle_batch_operation(args):
                 if action == 's':
                     fail_count += 1
                     processed_uids.add(scanned_uid)
-                    logging.info(f"Skipped ({success_count}/{total}, {fail_count} failed)")
+                    logging.info("Skipped (%s/%s, %s failed)", success_count, total, fail_count)
 
         # Final summary
-        logging.info(
-            f"\nOperation complete: {success_count} successful, {fail_count} failed, {total - success_count - fail_count} remaining")
+        logging.info("\nOperation complete: %s successful, %s failed, %s remaining",
+                     success_count, fail_count, total - success_count - fail_count)
 
     except KeyboardInterrupt:
         logging.info("\nOperation stopped by user")
@@ -216,33 +232,31 @@ def handle_batch_operation(args):
 
 def handle_scan_uids(args):
     """Scan NFCs and record UIDs to CSV file."""
+    from src.nfc.reader import NFCReader
+
     output_file = args.output or "output/nfc_scan_output.csv"
 
     # Load NFT data template if provided
     nft_data_rows = []
     if args.nft_data_file:
         try:
-            with open(args.nft_data_file, 'r') as f:
-                reader = csv.DictReader(f)
-                nft_data_rows = list(reader)
+            nft_data_rows = [(nft_id.strip(), offer.strip())
+                             for nft_id, offer in read_columns(args.nft_data_file, ('nft_id', 'offer'))]
             total_nfts = len(nft_data_rows)
-            logging.info(f"Loaded {total_nfts} NFT records from data file")
+            logging.info("Loaded %s NFT records from data file", total_nfts)
         except Exception as e:
-            logging.error(f"Failed to load nft data file: {e}")
+            logging.error("Failed to load nft data file: %s", e)
             return
 
     # Initialize or read existing CSV
     existing_uids = set()
     if os.path.exists(output_file):
-        with open(output_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                existing_uids.add(row['uid'])
+        existing_uids = load_uids(output_file)
 
         # Validate we haven't exceeded NFT data rows
         if nft_data_rows and len(existing_uids) >= len(nft_data_rows):
-            logging.error(
-                f"Already scanned {len(existing_uids)} UIDs - matches or exceeds available NFT records ({len(nft_data_rows)})")
+            logging.error("Already scanned %s UIDs - matches or exceeds available NFT records (%s)",
+                          len(existing_uids), len(nft_data_rows))
             return
 
     # Initialize reader
@@ -253,36 +267,36 @@ def handle_scan_uids(args):
 
     try:
         # Create/Open CSV file
-        with open(output_file, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['uid', 'version', 'nft_id', 'offer'])
+        with open(output_file, 'a', newline='', buffering=CSV_BUFFER_SIZE, encoding='utf-8') as f:
+            writer = csv.writer(f)
             # Write header if file is new
             if f.tell() == 0:
-                writer.writeheader()
+                writer.writerow(['uid', 'version', 'nft_id', 'offer'])
 
             count = len(existing_uids)
             nft_index = count  # Start from where we left off
 
             if nft_data_rows:
                 remaining = len(nft_data_rows) - count
-                logging.info(
-                    f"\nStarting scan. {count} UIDs already in file, {remaining} NFT records remaining to assign.")
+                logging.info("\nStarting scan. %s UIDs already in file, %s NFT records remaining to assign.",
+                             count, remaining)
             else:
-                logging.info(f"\nStarting scan. {count} UIDs already in file, {count} NFT records remaining to assign.")
+                logging.info("\nStarting scan. %s UIDs already in file, %s NFT records remaining to assign.",
+                             count, count)
 
+            version = (args.version or NFTData.DEFAULT_VERSION).strip()
             while True:
                 if nft_data_rows:
                     if nft_index >= len(nft_data_rows):
                         logging.info("\nAll NFT records have been assigned!")
                         break
                     remaining = len(nft_data_rows) - nft_index
-                    logging.info(f"\nNFT records remaining: {remaining}")
+                    logging.info("\nNFT records remaining: %s", remaining)
 
-                logging.info("Place NFC tag on reader and press Enter to scan (or 'q' to quit)...")
-                choice = input().lower()
-                if choice == 'q':
+                if not _prompt_for_tag(SCAN_TAG_PROMPT):
                     if nft_data_rows and nft_index < len(nft_data_rows):
                         remaining = len(nft_data_rows) - nft_index
-                        logging.warning(f"\nScan stopped with {remaining} NFT records still unassigned")
+                        logging.warning("\nScan stopped with %s NFT records still unassigned", remaining)
                     break
 
                 # Read tag UID
@@ -294,50 +308,41 @@ def handle_scan_uids(args):
 
                     tag_type = reader.get_tag_type()
                     if tag_type and reader.ndef_handler.is_locked(tag_type):
-                        logging.warning(f"Tag {uid} is locked - skipping")
+                        logging.warning("Tag %s is locked - skipping", uid)
                         continue
 
                     if uid in existing_uids:
-                        logging.warning(f"UID already scanned: {uid}")
+                        logging.warning("UID already scanned: %s", uid)
                         continue
 
                     # Get NFT data from template or use empty values
-                    nft_data = {
-                        'uid': uid.strip(),
-                        'version': (args.version or NFTData.DEFAULT_VERSION).strip(),
-                        'nft_id': '',
-                        'offer': ''
-                    }
-
+                    nft_id, offer = '', ''
                     if nft_data_rows:
-                        nft_data.update({
-                            'nft_id': nft_data_rows[nft_index]['nft_id'].strip(),
-                            'offer': nft_data_rows[nft_index]['offer'].strip()
-                        })
+                        nft_id, offer = nft_data_rows[nft_index]
                         nft_index += 1
 
-                    # Write new row
-                    writer.writerow(nft_data)
-                    f.flush()  # Ensure immediate write to file
+                    # Write the row and flush it before telling the operator it is recorded
+                    writer.writerow((uid, version, nft_id, offer))
+                    f.flush()
 
                     existing_uids.add(uid)
                     count += 1
-                    logging.info(f"Successfully recorded UID: {uid}")
+                    logging.info("Successfully recorded UID: %s", uid)
                     if nft_data_rows:
-                        logging.info(f"Assigned NFT ID: {nft_data['nft_id']}")
-                        logging.info(f"Assigned offer: {nft_data['offer']}")
-                        logging.info(f"NFTs remaining: {len(nft_data_rows) - count}")
+                        logging.info("Assigned NFT ID: %s", nft_id)
+                        logging.info("Assigned offer: %s", offer)
+                        logging.info("NFTs remaining: %s", len(nft_data_rows) - count)
                     else:
-                        logging.info(f"Total UIDs scanned: {count}")
+                        logging.info("Total UIDs scanned: %s", count)
                     logging.info("You can now remove the tag")
 
                 except Exception as e:
-                    logging.error(f"Error reading tag: {e}")
+                    logging.error("Error reading tag: %s", e)
 
     except KeyboardInterrupt:
         if nft_data_rows and nft_index < len(nft_data_rows):
             remaining = len(nft_data_rows) - nft_index
-            logging.warning(f"\nScan stopped with {remaining} NFT records still unassigned")
+            logging.warning("\nScan stopped with %s NFT records still unassigned", remaining)
         logging.info("\nOperation stopped by user")
     finally:
         reader.close()
@@ -345,29 +350,31 @@ def handle_scan_uids(args):
     if nft_data_rows:
         remaining = len(nft_data_rows) - count
         if remaining > 0:
-            logging.warning(f"\nScan complete but {remaining} NFT records remain unassigned")
+            logging.warning("\nScan complete but %s NFT records remain unassigned", remaining)
         else:
             logging.info("\nScan complete - all NFT records assigned!")
     else:
-        logging.info(f"\nScan complete. Total UIDs in file: {len(existing_uids)}")
+        logging.info("\nScan complete. Total UIDs in file: %s", len(existing_uids))
 
 
 def handle_info_command(args):
     """Display detailed tag information."""
+    from src.nfc.reader import NFCReader
+
     reader = NFCReader()
     if not reader.connect():
         return
 
     try:
-        logging.info("\nPlace tag on reader and press Enter...")
-        input()
+        if not _prompt_for_tag(INFO_TAG_PROMPT):
+            return
 
         info = reader.get_detailed_tag_info()
         if info:
             logging.info("\nTag Information:")
             logging.info("-" * 40)
             for key, value in info.items():
-                logging.info(f"{key.replace('_', ' ').title()}: {value}")
+                logging.info("%s: %s", key.replace('_', ' ').title(), value)
         else:
             logging.error("Failed to read tag information")
 
@@ -379,7 +386,7 @@ def handle_info_command(args):
 
 def create_parser():
     """Create argument parser."""
-    parser = argparse.ArgumentParser(description='NFT-NFC Operations')
+    parser = argparse.ArgumentParser(description='NFT-NFC Operations', allow_abbrev=False)
     subparsers = parser.add_subparsers(dest='command')
 
     # Common arguments for commands that use offer codes
@@ -450,18 +457,8 @@ def validate_args(args):
     return True, ""
 
 
-def main():
-    parser = create_parser()
-    args = parser.parse_args()
-
-    # Validate arguments before setting up logging
-    valid, error = validate_args(args)
-    if not valid:
-        if error:
-            print(f"Error: {error}")
-        parser.print_help()
-        return
-
+def run_command(args):
+    """Set up logging and dispatch a validated command."""
     setup_logging()
 
     try:
@@ -475,11 +472,31 @@ def main():
             handle_info_command(args)
 
     except FileNotFoundError as e:
-        logging.error(f"File not found: {e}")
+        logging.error("File not found: %s", e)
     except PermissionError as e:
-        logging.error(f"Permission denied: {e}")
+        logging.error("Permission denied: %s", e)
     except Exception as e:
-        logging.error(f"Operation failed: {e}")
+        logging.error("Operation failed: %s", e)
+
+
+def main():
+    # Bare 'info'/'read' take no options, so skip building the parser
+    if len(sys.argv) == 2 and sys.argv[1] in ('info', 'read'):
+        run_command(SimpleNamespace(command=sys.argv[1], uid=False))
+        return
+
+    parser = create_parser()
+    args = parser.parse_args()
+
+    # Validate arguments before setting up logging
+    valid, error = validate_args(args)
+    if not valid:
+        if error:
+            print(f"Error: {error}")
+        parser.print_help()
+        return
+
+    run_command(args)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,6 @@ setup(
     packages=find_packages(),
     install_requires=[
         "pyscard",  # Used for NFC operations
-        "ndef",     # Used for NFC writing in ndef format
     ],
-    python_requires=">=3.7",
+    python_requires=">=3.8",
 ) 
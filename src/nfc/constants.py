@@ -1,15 +1,27 @@
 """NFC-related constants and configuration."""
-from typing import Dict, Any
+from typing import Dict, NamedTuple, Tuple
 
 # APDU Commands for NFC operations
 APDU_COMMANDS = {
-    'GET_UID': [0xFF, 0xCA, 0x00, 0x00, 0x00],
-    'READ_PAGE': [0xFF, 0xB0, 0x00],  # Needs page number and length
-    'READ_PAGE_ALT': [0xFF, 0x30, 0x00],  # Alternative read command
-    'WRITE_PAGE': [0xFF, 0xD6, 0x00],  # Needs page number, length, and data
-    'WRITE_PAGE_ALT': [0xFF, 0xA2, 0x00]  # Alternative write command
+    'GET_UID': bytes((0xFF, 0xCA, 0x00, 0x00, 0x00)),
+    'READ_PAGE': bytes((0xFF, 0xB0, 0x00)),  # Needs page number and length
+    'READ_PAGE_ALT': bytes((0xFF, 0x30, 0x00)),  # Alternative read command
+    'WRITE_PAGE': bytes((0xFF, 0xD6, 0x00)),  # Needs page number, length, and data
+    'WRITE_PAGE_ALT': bytes((0xFF, 0xA2, 0x00)),  # Alternative write command
+    # NTAG FAST_READ wrapped in a PN53x InCommunicateThru pseudo-APDU, needs start and end page
+    'FAST_READ': bytes((0xFF, 0x00, 0x00, 0x00, 0x05, 0xD4, 0x42, 0x3A)),
+    # Type 2 READ (4 pages) wrapped in a PN53x InCommunicateThru pseudo-APDU, needs start page
+    'THRU_READ': bytes((0xFF, 0x00, 0x00, 0x00, 0x04, 0xD4, 0x42, 0x30)),
+    # NTAG WRITE wrapped in a PN53x InCommunicateThru pseudo-APDU, needs page number and 4 data bytes
+    'THRU_WRITE': bytes((0xFF, 0x00, 0x00, 0x00, 0x08, 0xD4, 0x42, 0xA2))
 }
 
+# Response prefix of a successful PN53x InCommunicateThru exchange
+PN53X_THRU_OK = bytes((0xD5, 0x43, 0x00))
+
+# Maximum pages requested per FAST_READ to stay within the reader's frame size
+FAST_READ_MAX_PAGES = 16
+
 # Supported tag types
 TAG_TYPES = {
     'NTAG213': 'NTAG213',
@@ -26,51 +38,84 @@ NDEF_TYPE_TEXT = 'T'
 NDEF_TYPE_URI = 'U'
 NDEF_MIME_TYPE = 'application/x-nft-data'
 
+# Dynamic lock byte patterns shared between tag types
+_LOCK_FF00 = bytes((0xFF, 0xFF, 0x00, 0x00))
+_LOCK_FFFF00 = bytes((0xFF, 0xFF, 0xFF, 0x00))
+
+
+def _cc(size_byte: int, version: int = 0x10) -> bytes:
+    """Build capability container bytes: NDEF magic, mapping version, data area size / 8, access."""
+    return bytes((0xE1, version, size_byte, 0x00))
+
+
 # NDEF configuration
 NDEF_CONFIG = {
     'NTAG213': {
         'data_start': 0x04,
         'data_area': (0x04, 0x27),
         'cc_page': 0x03,
-        'cc_bytes': bytes([0xE1, 0x10, 0x12, 0x00]),
+        'cc_bytes': _cc(0x12),
         'max_size': 144,
         'lock_page': 0x28,
-        'lock_bytes': bytes([0xFF, 0xFF, 0x00, 0x00])
+        'lock_bytes': _LOCK_FF00,
+        'lock_mask_bytes': 1  # Dynamic lock bytes holding lock bits
     },
     'NTAG215': {
         'data_start': 0x04,
         'data_area': (0x04, 0x81),
         'cc_page': 0x03,
-        'cc_bytes': bytes([0xE1, 0x10, 0x3E, 0x00]),
+        'cc_bytes': _cc(0x3E),
         'max_size': 504,
         'lock_page': 0x82,
-        'lock_bytes': bytes([0xFF, 0xFF, 0x00, 0x00])
+        'lock_bytes': _LOCK_FF00,
+        'lock_mask_bytes': 2
     },
     'NTAG216': {
         'data_start': 0x04,
         'data_area': (0x04, 0xE1),
         'cc_page': 0x03,
-        'cc_bytes': bytes([0xE1, 0x10, 0x6D, 0x00]),
+        'cc_bytes': _cc(0x6D),
         'max_size': 888,
         'lock_page': 0xE2,
-        'lock_bytes': bytes([0xFF, 0xFF, 0xFF, 0x00])
+        'lock_bytes': _LOCK_FFFF00,
+        'lock_mask_bytes': 3
     },
     'ULTRALIGHT': {
         'data_start': 0x04,
         'data_area': (0x04, 0x0F),
         'cc_page': 0x03,
-        'cc_bytes': bytes([0xE1, 0x10, 0x06, 0x00]),
+        'cc_bytes': _cc(0x06),
         'max_size': 48,
         'lock_page': 0x02,  # Static lock bytes
-        'lock_bytes': bytes([0xFF, 0xFF, 0x00, 0x00])
+        'lock_bytes': _LOCK_FF00,
+        'lock_mask_bytes': 0  # No dynamic lock bytes
     },
     'NTAG21x_2A': {
         'data_start': 0x04,
         'data_area': (0x04, 0x81),
         'cc_page': 0x03,
-        'cc_bytes': bytes([0xE1, 0x11, 0x7F, 0x00]),
+        'cc_bytes': _cc(0x7F, version=0x11),
         'max_size': 1016,
         'lock_page': 0x82,
-        'lock_bytes': bytes([0xFF, 0xFF, 0x00, 0x00])
+        'lock_bytes': _LOCK_FF00,
+        'lock_mask_bytes': 2
     }
 }
+
+
+class NdefConfig(NamedTuple):
+    """NDEF layout of a single tag type."""
+    data_start: int
+    data_area: Tuple[int, int]
+    cc_page: int
+    cc_bytes: bytes
+    max_size: int
+    lock_page: int
+    lock_bytes: bytes
+    lock_mask_bytes: int
+
+
+# NDEF configuration compiled to attribute-access records
+NDEF_CONFIG_FROZEN: Dict[str, NdefConfig] = {
+    tag_type: NdefConfig(**config) for tag_type, config in NDEF_CONFIG.items()
+}
@@ -1,16 +1,51 @@
 """NDEF message handling for NFT data."""
 
-import ndef
+import struct
 from typing import Dict, Optional
 import logging
-from .constants import (
-    NDEF_MIME_TYPE,
-    NDEF_CONFIG
-)
+from .constants import NDEF_CONFIG_FROZEN
 from .exceptions import TagLockedException
 import time
 
 
+# NDEF TLV tag and short text record header (MB=1, ME=1, CF=0, SR=1, IL=0, TNF=0x01)
+_TLV_TAG = 0x03
+_TLV_TERMINATOR = 0xFE
+_NDEF_HEADER = 0xD1
+_NDEF_TYPE_TEXT = ord('T')
+# Text record status byte (UTF-8, 2-byte language code) followed by the language code
+_NDEF_LANG_PREFIX = bytes([0x02, 0x65, 0x6E])  # 0x02 + "en"
+_TLV_HEADER_FORMAT = '>BBBBBB'
+
+
+class _LazyHex:
+    """Log argument that renders bytes as hex only if the record is emitted."""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self) -> str:
+        return self.data.hex()
+
+
+def build_ndef_tlv(nft_data: Dict[str, str]) -> bytes:
+    """Build the TLV-wrapped NDEF text record for NFT data, zero-padded to whole pages."""
+    data = f"{nft_data['version']}{nft_data['nft_id']}{nft_data['offer']}".encode('utf-8')
+
+    payload_len = len(_NDEF_LANG_PREFIX) + len(data)
+    record_len = 4 + payload_len  # NDEF header, type length, payload length, type
+    total_len = 2 + record_len + 1  # TLV tag and length, record, terminator
+
+    buf = bytearray(((total_len + 3) >> 2) << 2)
+    struct.pack_into(_TLV_HEADER_FORMAT, buf, 0,
+                     _TLV_TAG, record_len, _NDEF_HEADER, 0x01, payload_len, _NDEF_TYPE_TEXT)
+    buf[6:9] = _NDEF_LANG_PREFIX
+    buf[9:9 + len(data)] = data
+    buf[total_len - 1] = _TLV_TERMINATOR
+    return bytes(buf)
+
+
 class NFDEFHandler:
     """Handle NDEF message formatting and parsing."""
 
@@ -20,36 +55,31 @@ class NFDEFHandler:
     def is_locked(self, tag_type: str) -> bool:
         """Check if tag is locked based on lock bits."""
         try:
-            config = NDEF_CONFIG[tag_type]
-            if 'lock_page' not in config:
-                return False
+            config = NDEF_CONFIG_FROZEN[tag_type]
 
             # Read static lock bits first (common to all tags)
             static_lock = self.reader.read_page(2)
             if static_lock:
-                logging.debug(f"Static lock bits: {static_lock.hex()}")
+                logging.debug("Static lock bits: %s", _LazyHex(static_lock))
                 # Check only the lock bits (bytes 2 and 3)
-                if static_lock[2] & 0xFF or static_lock[3] & 0xFF:
-                    logging.info(f"Tag is locked (static lock bits: {static_lock.hex()})")
+                if int.from_bytes(static_lock[2:4], 'little'):
+                    logging.info("Tag is locked (static lock bits: %s)", _LazyHex(static_lock))
                     return True
 
             # For tags with dynamic lock bits
-            if tag_type != 'ULTRALIGHT':
-                lock_page = config['lock_page']
+            if config.lock_mask_bytes:
+                lock_page = config.lock_page
                 lock_data = self.reader.read_page(lock_page)
                 if lock_data:
-                    logging.debug(f"Lock bits at page {lock_page:02x}: {lock_data.hex()}")
-
-                    # Check dynamic lock bits based on tag type
-                    if tag_type == 'NTAG213':
-                        return bool(lock_data[0] & 0xFF)
-                    elif tag_type in ('NTAG215', 'NTAG21x_2A'):
-                        return bool(lock_data[0] & 0xFF or lock_data[1] & 0xFF)
-                    elif tag_type == 'NTAG216':
-                        return bool(lock_data[0] & 0xFF or lock_data[1] & 0xFF or lock_data[2] & 0xFF)
-
-            # If no lock bits are set, try a test write
-            test_page = config['data_start']
+                    logging.debug("Lock bits at page %02x: %s", lock_page, _LazyHex(lock_data))
+                    return bool(int.from_bytes(lock_data[:config.lock_mask_bytes], 'little'))
+            elif static_lock:
+                # All lock bits the tag has were read and are clear
+                logging.debug("Tag is writable")
+                return False
+
+            # If the lock bits could not be read, try a test write
+            test_page = config.data_start
             test_data = self.reader.read_page(test_page)  # Read current data
             if test_data:
                 # Try writing same data back
@@ -61,64 +91,78 @@ class NFDEFHandler:
             return False
 
         except Exception as e:
-            logging.debug(f"Lock check error: {e}")
+            logging.debug("Lock check error: %s", e)
             return False
 
-    def clear_tag(self, tag_type: str) -> bool:
-        """Clear all user memory of the tag."""
+    def clear_tag(self, tag_type: str, start_page: Optional[int] = None, end_page: Optional[int] = None) -> bool:
+        """Clear user memory of the tag, by default all of it.
+
+        Args:
+            tag_type: Type of the tag to clear
+            start_page: First page to clear (default: start of the data area)
+            end_page: Last page to clear (default: end of the data area)
+        """
         try:
             # Check if tag is locked
             if self.is_locked(tag_type):
                 raise TagLockedException("Tag is locked (dynamic lock bits set)")
 
-            config = NDEF_CONFIG[tag_type]
-            start_page = config['data_start']
-            end_page = config['data_area'][1]
+            config = NDEF_CONFIG_FROZEN[tag_type]
+            if start_page is None:
+                start_page = config.data_start
+            if end_page is None:
+                end_page = config.data_area[1]
 
-            # Clear all user memory pages
+            # Clear user memory pages
             clear_bytes = bytes([0x00] * 4)
+            _write = self.reader.write_page
+            _sleep = time.sleep
             for page in range(start_page, end_page + 1):
-                if not self.reader.write_page(page, clear_bytes):
-                    logging.error(f"Failed to clear page {page:02x}")
+                if not _write(page, clear_bytes):
+                    logging.error("Failed to clear page %02x", page)
                     return False
-                time.sleep(0.002)  # Sleep to ensure write is complete
+                _sleep(0.002)  # Sleep to ensure write is complete
 
-            logging.debug(f"Clearing tag memory (pages {start_page:02x}-{end_page:02x})")
+            logging.debug("Clearing tag memory (pages %02x-%02x)", start_page, end_page)
             return True
 
         except TagLockedException as e:
             raise
         except Exception as e:
-            logging.error(f"Failed to clear tag: {e}")
+            logging.error("Failed to clear tag: %s", e)
             return False
 
-    def format_tag(self) -> bool:
-        """Format tag for NDEF use."""
+    def format_tag(self, tlv_length: Optional[int] = None) -> bool:
+        """Format tag for NDEF use.
+
+        Args:
+            tlv_length: Length of the TLV data about to be written. When given, only
+                the pages following it are cleared instead of the whole data area.
+        """
         try:
             tag_type = self.reader.get_tag_type()
-            if not tag_type or tag_type not in NDEF_CONFIG:
+            config = self.reader.tag_config
+            if not tag_type or config is None:
                 logging.error("Unsupported tag type for NDEF")
                 return False
 
-            config = NDEF_CONFIG[tag_type]
-            cc_bytes = config['cc_bytes']
+            cc_bytes = config.cc_bytes
 
-            # Clear tag memory but continue regardless
-            self.clear_tag(tag_type)
-            time.sleep(0.1)
+            # Clear tag memory but continue regardless. The message write covers its own
+            # pages, so with a known length only a clean boundary after it is needed.
+            if tlv_length is None:
+                self.clear_tag(tag_type)
+            else:
+                first_free_page = config.data_start + (tlv_length + 3) // 4
+                self.clear_tag(tag_type, first_free_page, min(first_free_page + 1, config.data_area[1]))
 
             # Write Capability Container with retries
-            max_retries = 3
-            for attempt in range(max_retries):
-                if self.reader.write_page(config['cc_page'], cc_bytes):
-                    break
-                if attempt == max_retries - 1:
-                    logging.error("Failed to write capability container")
-                    return False
-                time.sleep(0.2)
+            if not self.reader.write_page_with_retry(config.cc_page, cc_bytes):
+                logging.error("Failed to write capability container")
+                return False
 
             # Verify CC but accept different sizes
-            response = self.reader.read_page(config['cc_page'])
+            response = self.reader.read_page(config.cc_page)
             if not response:
                 logging.error("Failed to read capability container")
                 return False
@@ -133,119 +177,111 @@ class NFDEFHandler:
                 else:
                     # Try one more time with reported size
                     adjusted_cc = bytes([cc_bytes[0], cc_bytes[1], response[2], cc_bytes[3]])
-                    if not self.reader.write_page(config['cc_page'], adjusted_cc):
+                    if not self.reader.write_page(config.cc_page, adjusted_cc):
                         return False
 
             return True
 
         except Exception as e:
-            logging.error(f"Failed to format tag: {e}")
+            logging.error("Failed to format tag: %s", e)
             return False
 
-    def write_ndef_message(self, nft_data: Dict[str, str]) -> bool:
-        """Write NFT data as NDEF message."""
+    def write_ndef_message(self, nft_data: Dict[str, str], tlv_data: Optional[bytes] = None) -> bool:
+        """Write NFT data as NDEF message.
+
+        Args:
+            nft_data: NFT data to write
+            tlv_data: Pre-built TLV bytes from build_ndef_tlv, built from nft_data if omitted
+        """
         try:
             tag_type = self.reader.get_tag_type()
-            if not tag_type or tag_type not in NDEF_CONFIG:
+            config = self.reader.tag_config
+            if not tag_type or config is None:
                 return False
 
-            config = NDEF_CONFIG[tag_type]
+            if tlv_data is None:
+                tlv_data = build_ndef_tlv(nft_data)
 
-            # Create the data string
-            data = f"{nft_data['version']}{nft_data['nft_id']}{nft_data['offer']}"
-
-            # Create language code + data payload
-            payload = bytes([0x02, 0x65, 0x6E]) + data.encode('utf-8')  # 0x02 + "en" + data
-
-            # Create NDEF record
-            ndef_record = bytes([
-                0xD1,  # NDEF header (MB=1, ME=1, CF=0, SR=1, IL=0, TNF=0x01)
-                0x01,  # Type length (1 byte for "T")
-                len(payload),  # Payload length
-                ord('T')  # Type ("T" for text record)
-            ]) + payload
-
-            # Add TLV wrapper
-            tlv_data = bytes([
-                0x03,  # NDEF Message TLV tag
-                len(ndef_record),  # TLV length
-                *ndef_record,  # NDEF message
-                0xFE  # TLV terminator
-            ])
-
-            if len(tlv_data) > config['max_size']:
-                logging.error(f"NDEF message too large for tag, max size {config['max_size']} got {len(tlv_data)}")
+            if len(tlv_data) > config.max_size:
+                logging.error("NDEF message too large for tag, max size %s got %s", config.max_size, len(tlv_data))
                 return False
 
             # Write data
-            current_page = config['data_start']
-            for i in range(0, len(tlv_data), 4):
-                chunk = tlv_data[i:i + 4].ljust(4, b'\x00')
-                if not self.reader.write_page(current_page, chunk):
-                    logging.error(f"Failed to write NDEF data at page {current_page:02x}")
-                    return False
-                current_page += 1
-                time.sleep(0.002)  # Sleep to ensure write is complete
+            if not self.reader.write_pages(config.data_start, tlv_data):
+                logging.error("Failed to write NDEF data")
+                return False
 
             logging.info("NDEF message written successfully")
             return True
 
         except Exception as e:
-            logging.error(f"Failed to write NDEF message: {e}")
+            logging.error("Failed to write NDEF message: %s", e)
             return False
 
     def read_ndef_message(self) -> Optional[Dict[str, str]]:
         """Read and parse NDEF message from tag."""
         try:
             tag_type = self.reader.get_tag_type()
-            if not tag_type:
+            config = self.reader.tag_config
+            if not tag_type or config is None:
                 logging.debug("Could not determine tag type")
                 return None
 
-            config = NDEF_CONFIG[tag_type]
-
-            # Read first data page
-            data = self.reader.read_page(config['data_start'])
+            # Read the first 4 data pages, which hold the TLV header and short messages
+            data = self.reader.read_block(config.data_start)
             if not data:
-                logging.debug("Could not read initial data page")
+                logging.debug("Could not read initial data pages")
                 return None
 
-            logging.debug(f"Initial data page: {data.hex()}")
+            logging.debug("Initial data pages: %s", _LazyHex(data))
 
-            # Check for NDEF TLV tag
-            if data[0] != 0x03:
-                logging.debug(f"Invalid NDEF TLV tag: {data[0]}")
+            # Check for NDEF TLV tag and get message length
+            tlv_tag, msg_length = struct.unpack_from('>BB', data, 0)
+            if tlv_tag != 0x03:
+                logging.debug("Invalid NDEF TLV tag: %s", tlv_tag)
                 return None
 
-            # Get message length
-            msg_length = data[1]
-            logging.debug(f"NDEF message length: {msg_length}")
+            logging.debug("NDEF message length: %s", msg_length)
 
-            # Read full message
-            message = bytearray()
-            pages_needed = (msg_length + 2 + 3) // 4  # Include TLV header and round up
+            # An empty TLV (blank or freshly formatted tag) cannot hold a record header
+            if msg_length < 4:
+                logging.debug("NDEF message too short for a record: %s bytes", msg_length)
+                return None
 
-            for page in range(config['data_start'], config['data_start'] + pages_needed):
-                page_data = self.reader.read_page(page)
-                if not page_data:
-                    logging.debug(f"Failed to read page {page}")
+            # Read the rest of the message beyond the pages already read
+            pages_needed = (msg_length + 2 + 3) >> 2  # Include TLV header and round up
+            if pages_needed <= 4:
+                message = data[:pages_needed * 4]
+            else:
+                rest = self.reader.read_pages(config.data_start + 4, config.data_start + pages_needed - 1)
+                if not rest:
+                    logging.debug("Failed to read NDEF message pages")
                     return None
-                message.extend(page_data)
+                message = data + rest
 
-            logging.debug(f"Full message data: {message.hex()}")
+            logging.debug("Full message data: %s", _LazyHex(message))
+
+            # Slice through a memoryview so the message bytes are not copied
+            view = memoryview(message)
 
             # Extract NDEF message (skip TLV header)
-            ndef_message = message[2:msg_length + 2]
-            logging.debug(f"NDEF message data: {ndef_message.hex()}")
+            ndef_message = view[2:msg_length + 2]
+            logging.debug("NDEF message data: %s", _LazyHex(ndef_message))
+
+            # Short text record header follows the 2-byte TLV header
+            rec_hdr, type_len, payload_len, rec_type = struct.unpack_from('>BBBB', message, 2)
+            if rec_hdr & 0x1F != 0x11 or type_len != 1 or rec_type != ord('T'):
+                logging.debug("Not a short text record (header %02x, type %02x)", rec_hdr, rec_type)
+                return None
 
-            # Skip TLV header (2 bytes) and NDEF header (4 bytes)
-            # Then skip language code (3 bytes: 0x02 + "en")
-            payload_start = 9  # 2 (TLV) + 4 (NDEF) + 3 (lang)
-            payload = message[payload_start:msg_length + 2]  # +2 for TLV header
+            # Skip the status byte and the language code it gives the length of
+            lang_len = message[6] & 0x3F
+            payload_start = 7 + lang_len
+            payload = view[payload_start:min(6 + payload_len, msg_length + 2)]
 
             # Convert to text and parse
-            text = payload.decode('utf-8')
-            logging.debug(f"Decoded payload: {text}")
+            text = str(payload, 'utf-8')
+            logging.debug("Decoded payload: %s", text)
 
             # Parse the components
             version = text[:5]  # DT001
@@ -259,8 +295,8 @@ class NFDEFHandler:
             }
 
         except Exception as e:
-            logging.error(f"Error reading NDEF message: {e}")
-            logging.debug(f"Exception type: {type(e)}")
+            logging.error("Error reading NDEF message: %s", e)
+            logging.debug("Exception type: %s", type(e))
             return None
 
     def lock_tag(self, tag_type: str = None) -> bool:
@@ -271,40 +307,27 @@ class NFDEFHandler:
                 return False
 
         try:
-            config = NDEF_CONFIG[tag_type]
+            config = NDEF_CONFIG_FROZEN[tag_type]
 
-            # Set static lock bits first (common to all tags)
+            # Static lock bits (common to all tags), then dynamic lock bits for tags that have them
             static_lock = bytes([0x00, 0x00, 0xFF, 0xFF])
-            for _ in range(3):  # Try up to 3 times
-                if self.reader.write_page(2, static_lock):
-                    break
-                time.sleep(0.1)
-            else:
-                logging.error("Failed to set static lock bits")
-                return False
+            writes = [(2, static_lock)]
+            if config.lock_mask_bytes:
+                writes.append((config.lock_page, config.lock_bytes))
 
-            # Set dynamic lock bits for tags that support them
-            if tag_type != 'ULTRALIGHT':
-                lock_page = config['lock_page']
-                lock_bytes = config['lock_bytes']
-
-                for _ in range(3):  # Try up to 3 times
-                    if self.reader.write_page(lock_page, lock_bytes):
-                        break
-                    time.sleep(0.1)
-                else:
-                    logging.error(f"Failed to set dynamic lock bits for {tag_type}")
-                    return False
+            if not self.reader.write_pages_bulk(writes):
+                logging.error("Failed to set lock bits for %s", tag_type)
+                return False
 
-            # Verify the lock was successful
-            time.sleep(0.1)  # Give the tag time to process
+            # Verify the lock was successful. Only check that lock bits are set: the
+            # written 0xFF bytes include RFUI bits a tag need not store.
             if not self.is_locked(tag_type):
                 logging.error("Lock verification failed")
                 return False
 
-            logging.info(f"Successfully locked {tag_type} tag")
+            logging.info("Successfully locked %s tag", tag_type)
             return True
 
         except Exception as e:
-            logging.error(f"Failed to lock tag: {e}")
+            logging.error("Failed to lock tag: %s", e)
             return False
@@ -1,14 +1,25 @@
 """NFC reader interface and operations."""
 
 import logging
-from typing import Optional, Tuple, Dict
+import time
+from typing import Dict, Iterable, Optional, Tuple
 from smartcard.System import readers
-from smartcard.util import toHexString
 from smartcard.Exceptions import NoCardException
 
-from .constants import APDU_COMMANDS
+from .constants import APDU_COMMANDS, FAST_READ_MAX_PAGES, NDEF_CONFIG_FROZEN, NdefConfig, PN53X_THRU_OK
 from .exceptions import *
-from .ndef_utils import NFDEFHandler
+from .ndef_utils import NFDEFHandler, build_ndef_tlv
+
+# Page read/write command forms, in the order they are tried
+READ_COMMANDS = (APDU_COMMANDS['READ_PAGE'], APDU_COMMANDS['READ_PAGE_ALT'])
+WRITE_COMMANDS = (APDU_COMMANDS['WRITE_PAGE'], APDU_COMMANDS['WRITE_PAGE_ALT'])
+
+
+def _preferred_first(preferred: Optional[bytes], commands: Tuple[bytes, ...]) -> Tuple[bytes, ...]:
+    """Order commands so the one known to work is tried first."""
+    if preferred is None:
+        return commands
+    return (preferred,) + tuple(cmd for cmd in commands if cmd != preferred)
 
 
 class NFCReader:
@@ -18,6 +29,34 @@ class NFCReader:
         self.reader = None
         self.connection = None
         self.ndef_handler = None
+        # Tag type detected for the card with this UID, reused until a different card is seen
+        self._tag_uid = None
+        self._tag_type = None
+        self._tag_config = None
+        # Pages 0-3 (UID, static lock bytes and CC) of the card with UID _first_pages_uid
+        self._first_pages_uid = None
+        self._first_pages = None
+        # Page command forms the reader accepted, tried first on later calls
+        self._read_cmd = None
+        self._write_cmd = None
+        # Whether the reader passes raw tag commands through (PN53x InCommunicateThru),
+        # None until the first pass-through exchange
+        self._thru_supported = None
+        # Single worker thread that runs card I/O for the *_async methods
+        self._executor = None
+
+    @property
+    def tag_config(self) -> Optional[NdefConfig]:
+        """NDEF configuration of the tag identified by the last get_tag_type call."""
+        return self._tag_config
+
+    def _clear_tag_cache(self):
+        """Forget the cached tag type."""
+        self._tag_uid = None
+        self._tag_type = None
+        self._tag_config = None
+        self._first_pages_uid = None
+        self._first_pages = None
 
     def connect(self) -> bool:
         """Connect to NFC reader."""
@@ -27,7 +66,7 @@ class NFCReader:
                 raise ReaderNotFoundError("No NFC readers found")
             
             self.reader = available_readers[0]
-            logging.info(f"Found reader: {self.reader}")
+            logging.info("Found reader: %s", self.reader)
             
             self.connection = self.reader.createConnection()
             try:
@@ -44,8 +83,12 @@ class NFCReader:
                 raise ReaderConnectionError(f"Failed to connect to reader: {str(e)}")
             return False
 
-    def _transmit(self, command: list, description: str) -> Tuple[list, int, int]:
-        """Helper method to transmit APDU commands and handle errors."""
+    def _transmit(self, command: bytes, description: str, *args) -> Tuple[list, int, int]:
+        """Helper method to transmit APDU commands and handle errors.
+
+        description is a %-style format string for args, only formatted if the
+        failure is logged.
+        """
         try:
             if not self.connection:
                 raise ReaderConnectionError("Reader not connected")
@@ -54,46 +97,113 @@ class NFCReader:
                 # Try to connect if not already connected
                 self.connection.connect()
             except NoCardException:
+                self._clear_tag_cache()
+                self._read_cmd = None
+                self._write_cmd = None
                 raise NFCError("No card detected")
                 
-            response, sw1, sw2 = self.connection.transmit(command)
+            # pyscard expects a list of ints
+            response, sw1, sw2 = self.connection.transmit(list(command))
             if sw1 != 0x90:
-                logging.debug(f"{description} failed. Status: {hex(sw1)}{hex(sw2)}")
+                logging.debug(description + " failed. Status: %#x%#x", *args, sw1, sw2)
             return response, sw1, sw2
             
         except Exception as e:
             raise NFCError(f"Command transmission error: {str(e)}")
 
+    def _run_in_worker(self, func, *args, **kwargs):
+        """Schedule a blocking reader call on the worker thread and return an awaitable.
+
+        A single worker keeps card exchanges serialized, so calls made from
+        concurrent tasks never interleave on the connection. Do not mix these
+        with direct synchronous calls while an async call is in flight.
+        """
+        # Imported here so the synchronous CLI paths do not pay for them
+        import asyncio
+        import functools
+        from concurrent.futures import ThreadPoolExecutor
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='nfc-reader')
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def transmit_async(self, command: bytes, description: str, *args) -> Tuple[list, int, int]:
+        """Transmit an APDU on the worker thread, leaving the event loop free meanwhile."""
+        return await self._run_in_worker(self._transmit, command, description, *args)
+
+    def _transmit_thru(self, command: bytes, description: str, *args) -> Optional[list]:
+        """Send a PN53x InCommunicateThru frame and return the tag's response data.
+
+        Returns None if the reader or the tag rejected the frame. A reader that
+        rejects the pseudo-APDU itself is remembered and not sent any more.
+        """
+        if self._thru_supported is False:
+            return None
+        response, sw1, _ = self._transmit(command, description, *args)
+        if sw1 != 0x90:
+            if self._thru_supported is None:
+                self._thru_supported = False
+            return None
+        self._thru_supported = True
+        if bytes(response[:3]) != PN53X_THRU_OK:
+            return None
+        return response[3:]
+
     def read_tag_uid(self) -> Optional[str]:
-        """Read NFC tag UID."""
+        """Read NFC tag UID as uppercase, space-separated hex (e.g. '04 57 63 15 BD 2A 81')."""
         response, sw1, sw2 = self._transmit(
             APDU_COMMANDS['GET_UID'],
             "Reading UID"
         )
         
         if sw1 == 0x90:
-            return toHexString(response)
+            return bytes(response).hex(' ').upper()
         return None
 
     def get_tag_type(self) -> Optional[str]:
-        """Identify the type of tag."""
+        """Identify the type of tag, reusing the cached result while the same card is present."""
         uid = self.read_tag_uid()
         if not uid:
+            self._clear_tag_cache()
             return None
 
-        # Read manufacturer data
-        response = self.read_page(0)
-        if not response or len(uid.split()) != 7:
+        if uid == self._tag_uid:
+            return self._tag_type
+
+        tag_type = self._detect_tag_type(uid)
+        if tag_type:
+            self._tag_uid = uid
+            self._tag_type = tag_type
+            self._tag_config = NDEF_CONFIG_FROZEN.get(tag_type)
+        else:
+            self._clear_tag_cache()
+        return tag_type
+
+    def _read_first_pages(self, uid: str) -> Optional[bytes]:
+        """Read pages 0-3 in one go, reusing them while the card with this UID is present."""
+        if uid == self._first_pages_uid:
+            return self._first_pages
+
+        # READ rather than FAST_READ, since the tag type is not known yet
+        first_pages = self.read_block(0)
+        if first_pages:
+            self._first_pages_uid = uid
+            self._first_pages = first_pages
+        return first_pages
+
+    def _detect_tag_type(self, uid: str) -> Optional[str]:
+        """Detect the tag type from manufacturer, version and CC data."""
+        if len(uid.split()) != 7:
             return None
 
-        if response[0] == 0x04:  # NTAG21x family
-            # Read version data to determine exact variant
-            version_data = []
-            for page in range(0, 3):
-                data = self.read_page(page)
-                if data:
-                    version_data.extend(data)
+        # Manufacturer data (page 0), version data (pages 0-2) and CC (page 3)
+        first_pages = self._read_first_pages(uid)
+        if not first_pages:
+            return None
 
+        if first_pages[0] == 0x04:  # NTAG21x family
+            version_data = first_pages[0:12]
             if len(version_data) >= 8:
                 prod_type = version_data[6]
                 if prod_type == 0x0F:
@@ -106,7 +216,7 @@ class NFCReader:
                     return 'NTAG21x_2A'
                 
             # If version info unavailable or unknown type, try to identify by memory size
-            cc_data = self.read_page(3)
+            cc_data = first_pages[12:16]
             if cc_data and cc_data[0] == 0xE1:
                 memory_size = cc_data[2] * 8  # Size in bytes
                 if memory_size == 1016:  # Your tag appears to have this size
@@ -120,22 +230,117 @@ class NFCReader:
 
     def read_page(self, page: int) -> Optional[bytes]:
         """Read a single page from the tag."""
-        for cmd_base in [APDU_COMMANDS['READ_PAGE'], APDU_COMMANDS['READ_PAGE_ALT']]:
-            cmd = cmd_base + [page, 4]  # 4 bytes per page
-            response, sw1, sw2 = self._transmit(cmd, f"Reading page {page}")
+        for cmd_base in _preferred_first(self._read_cmd, READ_COMMANDS):
+            cmd = cmd_base + bytes((page, 4))  # 4 bytes per page
+            response, sw1, sw2 = self._transmit(cmd, "Reading page %d", page)
             if sw1 == 0x90:
+                self._read_cmd = cmd_base
                 return bytes(response)
         return None
 
+    def read_block(self, page: int) -> Optional[bytes]:
+        """Read the 16 bytes of pages page..page+3 with a single Type 2 READ.
+
+        Every Type 2 tag supports READ, unlike FAST_READ. Falls back to
+        single-page reads if the reader or tag rejects it.
+        """
+        response = self._transmit_thru(APDU_COMMANDS['THRU_READ'] + bytes((page,)),
+                                       "Reading pages %d-%d", page, page + 3)
+        if response is not None and len(response) == 16:
+            return bytes(response)
+
+        data = bytearray()
+        for fallback_page in range(page, page + 4):
+            page_data = self.read_page(fallback_page)
+            if not page_data:
+                return None
+            data.extend(page_data)
+        return bytes(data)
+
+    def read_pages(self, start: int, end: int) -> Optional[bytes]:
+        """Read pages start..end (inclusive) with NTAG FAST_READ.
+
+        Tags not identified as NTAG are read in 4-page READ blocks instead,
+        since other Type 2 tags NAK FAST_READ and drop to IDLE. Falls back to
+        single-page reads for any range the reader or tag rejects.
+        """
+        if not (self._tag_type or '').startswith('NTAG'):
+            data = bytearray()
+            for page in range(start, end + 1, 4):
+                block = self.read_block(page)
+                if block is None:
+                    return None
+                data.extend(block)
+            return bytes(data[:(end - start + 1) * 4])
+
+        data = bytearray()
+        page = start
+        while page <= end:
+            last = min(end, page + FAST_READ_MAX_PAGES - 1)
+            cmd = APDU_COMMANDS['FAST_READ'] + bytes((page, last))
+            response = self._transmit_thru(cmd, "Fast reading pages %d-%d", page, last)
+            if response is not None and len(response) == (last - page + 1) * 4:
+                data.extend(response)
+            else:
+                for fallback_page in range(page, last + 1):
+                    page_data = self.read_page(fallback_page)
+                    if not page_data:
+                        return None
+                    data.extend(page_data)
+            page = last + 1
+        return bytes(data)
+
     def write_page(self, page: int, data: bytes) -> bool:
         """Write data to a single page."""
-        for cmd_base in [APDU_COMMANDS['WRITE_PAGE'], APDU_COMMANDS['WRITE_PAGE_ALT']]:
-            cmd = cmd_base + [page, len(data)] + list(data)
-            _, sw1, _ = self._transmit(cmd, f"Writing page {page}")
+        if page < 4:
+            # Pages 0-3 are cached by _read_first_pages
+            self._first_pages_uid = None
+        for cmd_base in _preferred_first(self._write_cmd, WRITE_COMMANDS):
+            cmd = cmd_base + bytes((page, len(data))) + data
+            _, sw1, _ = self._transmit(cmd, "Writing page %d", page)
             if sw1 == 0x90:
+                self._write_cmd = cmd_base
                 return True
         return False
 
+    def write_page_with_retry(self, page: int, data: bytes, max_retries: int = 3) -> bool:
+        """Write a single page, backing off exponentially between failed attempts only."""
+        for attempt in range(max_retries):
+            if self.write_page(page, data):
+                return True
+            if attempt < max_retries - 1:
+                time.sleep(0.005 * (2 ** attempt))
+        return False
+
+    def write_pages(self, start_page: int, data: bytes) -> bool:
+        """Write data to consecutive pages from start_page, zero-padding the last page."""
+        padded = bytes(data) + b'\x00' * (-len(data) % 4)
+        return self.write_pages_bulk(
+            (page, padded[i:i + 4])
+            for page, i in enumerate(range(0, len(padded), 4), start_page)
+        )
+
+    def write_pages_bulk(self, writes: Iterable[Tuple[int, bytes]]) -> bool:
+        """Write (page, 4 bytes) pairs, in order, as back-to-back raw NTAG WRITE frames.
+
+        The tag's ACK already guarantees each write completed, so no delay is
+        added. All frames are built before the first transmit so nothing but
+        I/O sits between them. A page that is not acknowledged, or any page on
+        a reader without pass-through, is written through write_page_with_retry.
+        """
+        header = APDU_COMMANDS['THRU_WRITE']
+        frames = [(page, chunk, header + bytes((page,)) + chunk) for page, chunk in writes]
+        if any(page < 4 for page, _, _ in frames):
+            # Pages 0-3 are cached by _read_first_pages
+            self._first_pages_uid = None
+        _transmit_thru = self._transmit_thru
+        for page, chunk, cmd in frames:
+            if _transmit_thru(cmd, "Writing page %d", page) is None:
+                if not self.write_page_with_retry(page, chunk):
+                    logging.error("Failed to write page %02x", page)
+                    return False
+        return True
+
     def read_data(self) -> Optional[Dict[str, str]]:
         """Read NDEF formatted data from NFC tag."""
         try:
@@ -149,11 +354,18 @@ class NFCReader:
             return None
 
         except Exception as e:
-            logging.error(f"Failed to read data: {e}")
+            logging.error("Failed to read data: %s", e)
             return None
 
-    def write_data(self, nft_data: dict, lock: bool = False) -> bool:
-        """Write NFT data to tag and optionally lock it."""
+    async def read_data_async(self) -> Optional[Dict[str, str]]:
+        """Asynchronous read_data, run on the reader's worker thread."""
+        return await self._run_in_worker(self.read_data)
+
+    def write_data(self, nft_data: dict, lock: bool = False, tlv_data: Optional[bytes] = None) -> bool:
+        """Write NFT data to tag and optionally lock it.
+
+        tlv_data may carry NDEF bytes pre-built with build_ndef_tlv to skip encoding here.
+        """
         try:
             tag_type = self.get_tag_type()
             if not tag_type:
@@ -165,12 +377,15 @@ class NFCReader:
                 logging.error("Tag is already locked")
                 return False
             
+            if tlv_data is None:
+                tlv_data = build_ndef_tlv(nft_data)
+
             # Format and write NDEF data
-            if not self.ndef_handler.format_tag():
+            if not self.ndef_handler.format_tag(len(tlv_data)):
                 logging.error("Failed to format tag")
                 return False
             
-            if not self.ndef_handler.write_ndef_message(nft_data):
+            if not self.ndef_handler.write_ndef_message(nft_data, tlv_data):
                 logging.error("Failed to write NDEF message")
                 return False
             
@@ -186,11 +401,23 @@ class NFCReader:
             return True
         
         except Exception as e:
-            logging.error(f"Write failed: {e}")
+            logging.error("Write failed: %s", e)
             return False
 
+    async def write_data_async(self, nft_data: dict, lock: bool = False,
+                               tlv_data: Optional[bytes] = None) -> bool:
+        """Asynchronous write_data, run on the reader's worker thread."""
+        return await self._run_in_worker(self.write_data, nft_data, lock=lock, tlv_data=tlv_data)
+
     def close(self):
         """Close the connection to the reader."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._clear_tag_cache()
+        self._read_cmd = None
+        self._write_cmd = None
+        self._thru_supported = None
         if self.connection:
             self.connection.disconnect()
             logging.info("Reader connection closed")
@@ -203,30 +430,23 @@ class NFCReader:
                 logging.error("Failed to read UID")
                 return {}
 
-            # Read manufacturer data (page 0)
-            mfg_data = self.read_page(0)
-            if not mfg_data:
+            # Manufacturer data (page 0), version data (pages 0x00-0x02),
+            # static lock bytes (page 2) and capability container (page 3)
+            first_pages = self._read_first_pages(uid)
+            if not first_pages:
                 logging.error("Failed to read manufacturer data")
                 return {}
 
-            # Read capability container (page 3)
-            cc_data = self.read_page(3)
-            if not cc_data:
-                logging.error("Failed to read capability container")
-                return {}
-
-            # Read version data (pages 0x00-0x02)
-            version_data = []
-            for page in range(0, 3):
-                data = self.read_page(page)
-                if data:
-                    version_data.extend(data)
+            mfg_data = first_pages[0:4]
+            version_data = first_pages[0:12]
+            static_lock_bytes = first_pages[8:12]
+            cc_data = first_pages[12:16]
 
             info = {
                 'uid': uid,
                 'manufacturer_data': mfg_data.hex(),
                 'cc_bytes': cc_data.hex(),
-                'version_data': bytes(version_data).hex()
+                'version_data': version_data.hex()
             }
 
             # Identify exact tag type
@@ -250,9 +470,7 @@ class NFCReader:
                 info['type'] = 'Unknown'
 
             # Check for locked/protected areas
-            static_lock_bytes = self.read_page(2)
-            if static_lock_bytes:
-                info['static_lock'] = static_lock_bytes.hex()
+            info['static_lock'] = static_lock_bytes.hex()
 
             # For NTAG21x, check dynamic lock bytes
             if 'NTAG' in info.get('type', ''):
@@ -273,5 +491,5 @@ class NFCReader:
             return info
 
         except Exception as e:
-            logging.error(f"Failed to get detailed tag info: {e}")
+            logging.error("Failed to get detailed tag info: %s", e)
             return {}
@@ -3,23 +3,32 @@
 from dataclasses import dataclass
 from .exceptions import ValidationError
 
+DEFAULT_VERSION = "DT001"
+DEFAULT_OFFER_LENGTH = 64  # New default length
+LEGACY_OFFER_LENGTH = 5    # Original length
+MAX_OFFER_LENGTH = 64      # Hardcoded to the default length
+MAX_VERSION_LENGTH = 5
+MAX_NFT_ID_LENGTH = 62
+
 
 @dataclass
 class NFTData:
     """NFT data structure."""
+    __slots__ = ('version', 'nft_id', 'offer')
+
     version: str
     nft_id: str
     offer: str
-    
-    DEFAULT_VERSION = "DT001"
-    DEFAULT_OFFER_LENGTH = 64  # New default length
-    LEGACY_OFFER_LENGTH = 5    # Original length
-    MAX_OFFER_LENGTH = 64      # Hardcoded to the default length
+
+    DEFAULT_VERSION = DEFAULT_VERSION
+    DEFAULT_OFFER_LENGTH = DEFAULT_OFFER_LENGTH
+    LEGACY_OFFER_LENGTH = LEGACY_OFFER_LENGTH
+    MAX_OFFER_LENGTH = MAX_OFFER_LENGTH
     
     def __post_init__(self):
         """Validate data after initialization."""
         if not self.version:
-            self.version = self.DEFAULT_VERSION
+            self.version = DEFAULT_VERSION
             
         if not self.nft_id:
             raise ValueError("NFT ID is required")
@@ -28,16 +37,15 @@ class NFTData:
             raise ValueError("Offer code is required")
             
         # Validate lengths
-        version_length = len(self.version)
-        if version_length > 5:
+        if len(self.version) > MAX_VERSION_LENGTH:
             raise ValueError("Version string too long (max 5 characters)")
 
         nft_length = len(self.nft_id)
-        if nft_length > 62:
+        if nft_length > MAX_NFT_ID_LENGTH:
             raise ValueError(f"NFT ID too long (max 62 characters expected, got {nft_length})")
             
         # Offer code validation is now handled separately
-            
+
     def validate_offer_length(self, strict: bool = True, legacy: bool = False) -> bool:
         """
         Validate offer code length.
@@ -47,21 +55,21 @@ class NFTData:
             legacy: If True, use LEGACY_OFFER_LENGTH, else use DEFAULT_OFFER_LENGTH
         """
         offer_len = len(self.offer)
-        target_len = self.LEGACY_OFFER_LENGTH if legacy else self.DEFAULT_OFFER_LENGTH
+        target_len = LEGACY_OFFER_LENGTH if legacy else DEFAULT_OFFER_LENGTH
         
         if strict:
             if offer_len != target_len:
                 raise ValueError(f"Offer code must be exactly {target_len} characters, got {offer_len}")
-        elif offer_len > self.MAX_OFFER_LENGTH:
-            raise ValueError(f"Offer code too long (max {self.MAX_OFFER_LENGTH} characters expected, got {offer_len})")
+        elif offer_len > MAX_OFFER_LENGTH:
+            raise ValueError(f"Offer code too long (max {MAX_OFFER_LENGTH} characters expected, got {offer_len})")
             
         return True
 
     def validate(self):
         """Validate NFT data format."""
-        if len(self.version) != 5:
+        if len(self.version) != MAX_VERSION_LENGTH:
             raise ValidationError("Version must be 5 characters")
         if not self.nft_id.startswith("nft1"):
             raise ValidationError("NFT ID must start with 'nft1'")
-        if not self.validate_offer_length():
-            raise ValidationError("Offer code length is invalid")
+        # Raises on an invalid length, so no result to check
+        self.validate_offer_length()
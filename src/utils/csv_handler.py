@@ -1,56 +1,264 @@
 """CSV processing for batch NFC operations."""
 
 import csv
+import itertools
 import logging
+import mmap
+import sys
+from collections import Counter
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 from pathlib import Path
 import os
 
+# I/O buffer size for CSV files
+CSV_BUFFER_SIZE = 1 << 20
 
-@dataclass
+# Columns of a record CSV, in file order
+_FIELDNAMES = ('uid', 'version', 'nft_id', 'offer')
+
+# Extracts a record dict's fields as a row tuple in _FIELDNAMES order
+_record_row = itemgetter(*_FIELDNAMES)
+
+# Files larger than this are parsed with pyarrow when it is installed
+ARROW_MIN_FILE_SIZE = 1 << 20
+
+# Data-only sync where the platform has it (Linux), full fsync elsewhere
+_fdatasync = getattr(os, 'fdatasync', os.fsync)
+
+
+# Record processing statuses, interned so every record shares the same string objects
+STATUS_PENDING = sys.intern('pending')
+STATUS_SUCCESS = sys.intern('success')
+STATUS_FAILED = sys.intern('failed')
+STATUS_SKIPPED = sys.intern('skipped')
+_STATUSES = {status: status for status in (STATUS_PENDING, STATUS_SUCCESS, STATUS_FAILED, STATUS_SKIPPED)}
+
+# Slotted dataclasses need Python 3.10; older versions get a regular dataclass. Manual
+# __slots__ would clash with the field defaults.
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class CSVRecord:
     """Single record from CSV file."""
     uid: str
     version: str
     nft_id: str
     offer: str
-    status: str = "pending"  # pending, success, failed, skipped
+    status: str = STATUS_PENDING  # pending, success, failed, skipped
     message: str = ""
 
 
+def load_uids(csv_path: str) -> Set[str]:
+    """Load the uid column of a scan output CSV file.
+
+    Scans the memory-mapped file for line boundaries instead of running
+    every row through the csv module. Splitting on raw bytes is only safe
+    without quoted fields, so a file containing any quote character is
+    parsed with csv.reader instead.
+    """
+    uids = set()
+    with open(csv_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return uids
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b'"') >= 0:
+                return _load_uids_quoted(csv_path)
+            end = len(mm)
+            pos = mm.find(b'\n')
+            if pos < 0:
+                return uids
+            header = mm[:pos].rstrip(b'\r').decode('utf-8').split(',')
+            uid_col = header.index('uid')
+            pos += 1
+            while pos < end:
+                nl = mm.find(b'\n', pos)
+                if nl < 0:
+                    nl = end
+                line = mm[pos:nl].rstrip(b'\r')
+                if line:
+                    uids.add(line.split(b',', uid_col + 1)[uid_col].decode('utf-8'))
+                pos = nl + 1
+    return uids
+
+
+def _load_uids_quoted(csv_path: str) -> Set[str]:
+    """Load the uid column of a CSV file whose fields may be quoted."""
+    with open(csv_path, 'r', newline='', buffering=CSV_BUFFER_SIZE, encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return set()
+        uid_col = header.index('uid')
+        return {row[uid_col] for row in reader if row}
+
+
+def _read_arrow_table(csv_path, columns: Sequence[str]):
+    """Read CSV columns as strings with pyarrow.
+
+    Returns None if pyarrow is not installed, or if it rejects the file (a
+    missing column, or a row whose field count differs from the header), so
+    the caller parses it with csv.reader and applies the same row rules and
+    ValueError as for small files.
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        return None
+
+    read_options = pa_csv.ReadOptions(block_size=CSV_BUFFER_SIZE)
+    convert_options = pa_csv.ConvertOptions(
+        column_types={name: pa.string() for name in columns},
+        include_columns=list(columns)
+    )
+    try:
+        return pa_csv.read_csv(str(csv_path), read_options=read_options, convert_options=convert_options)
+    except (pa.ArrowInvalid, KeyError) as e:
+        logging.debug("pyarrow could not parse %s, falling back to csv: %s", csv_path, e)
+        return None
+
+
+def iter_columns(csv_path: str, columns: Sequence[str]) -> Iterator[Tuple[str, ...]]:
+    """Yield the named columns of a CSV file as row tuples, without a dict per row.
+
+    Raises:
+        ValueError: If a column is missing or a row ends before a requested column
+    """
+    if os.path.getsize(csv_path) > ARROW_MIN_FILE_SIZE:
+        table = _read_arrow_table(csv_path, columns)
+        if table is not None:
+            yield from zip(*(table.column(name).to_pylist() for name in columns))
+            return
+
+    with open(csv_path, 'r', newline='', buffering=CSV_BUFFER_SIZE, encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        indexes = [header.index(name) for name in columns]
+        last_index = max(indexes, default=-1)
+        for row in reader:
+            if row:
+                if len(row) <= last_index:
+                    raise ValueError(f"CSV line {reader.line_num} has {len(row)} fields, "
+                                     f"need at least {last_index + 1}")
+                yield tuple(row[i] for i in indexes)
+
+
+def read_columns(csv_path: str, columns: Sequence[str]) -> List[Tuple[str, ...]]:
+    """Read the named columns of a CSV file as a list of row tuples."""
+    return list(iter_columns(csv_path, columns))
+
+
 class CSVHandler:
     """Handle CSV processing."""
     
     def __init__(self, csv_path: str):
         self.csv_path = Path(csv_path)
+        # Append handle and writer, opened on first write and kept until close()
+        self._fh = None
+        self._writer = None
+        # Size of the file when the handler was created, -1 if it did not exist
+        try:
+            self._initial_size = os.stat(self.csv_path).st_size
+        except FileNotFoundError:
+            self._initial_size = -1
+        # Whether the file already has a header
+        self._header_written = self._initial_size > 0
+        # Records by UID, filled by load(), and the number of records in each status
+        self.records: Dict[str, CSVRecord] = {}
+        self._status_counts = Counter(dict.fromkeys(_STATUSES, 0))
+
+    def __enter__(self) -> 'CSVHandler':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush and close the append handle, if one is open."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            self._writer = None
+
+    def _get_writer(self):
+        """Return the append csv.writer, opening the file and writing the header on first use."""
+        if self._writer is None:
+            self._fh = open(self.csv_path, 'a', newline='', buffering=CSV_BUFFER_SIZE, encoding='utf-8')
+            self._writer = csv.writer(self._fh)
+            if not self._header_written:
+                self._writer.writerow(_FIELDNAMES)
+                self._header_written = True
+        return self._writer
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        """Iterate over records lazily, see iter_records."""
+        return self.iter_records()
+
+    def iter_records(self) -> Iterator[Dict[str, str]]:
+        """Yield records from CSV file one at a time, logging an error if there are none.
+
+        Read errors, including a malformed row part way through, are raised to
+        the caller rather than ending the stream early.
+        """
+        rows = iter_columns(self.csv_path, _FIELDNAMES)
+        first = next(rows, None)
+        if first is None:
+            logging.error("No records found in CSV file")
+            return
+
+        for uid, version, nft_id, offer in itertools.chain((first,), rows):
+            yield {'uid': uid, 'version': version, 'nft_id': nft_id, 'offer': offer}
+
+    def read_records_fast(self):
+        """Read all records into a pyarrow Table with the native CSV parser.
+
+        Columns are kept as Arrow string arrays, so they can be used without
+        building a dict per row. Returns None if pyarrow is not installed.
+        """
+        return _read_arrow_table(self.csv_path, _FIELDNAMES)
 
     def read_records(self) -> List[Dict[str, str]]:
-        """Read records from CSV file."""
+        """Read all records from CSV file into a list, or an empty list if any row fails."""
+        try:
+            return list(self.iter_records())
+        except FileNotFoundError:
+            logging.error("CSV file not found: %s", self.csv_path)
+        except Exception as e:
+            logging.error("Failed to read CSV file: %s", e)
+        return []
+
+    def load(self) -> Dict[str, CSVRecord]:
+        """Load records from CSV file keyed by UID (first occurrence wins), all pending.
+
+        If any row fails to read, no records are loaded.
+        """
+        records = {}
         try:
-            with open(self.csv_path, 'r') as f:
-                reader = csv.DictReader(f)
-                records = list(reader)
-                if not records:
-                    logging.error("No records found in CSV file")
-                return records
-                
+            for uid, version, nft_id, offer in iter_columns(self.csv_path, _FIELDNAMES):
+                if uid not in records:
+                    records[uid] = CSVRecord(uid, version, nft_id, offer)
         except FileNotFoundError:
-            logging.error(f"CSV file not found: {self.csv_path}")
-            return []
+            logging.error("CSV file not found: %s", self.csv_path)
+            records = {}
         except Exception as e:
-            logging.error(f"Failed to read CSV file: {e}")
-            return []
+            logging.error("Failed to read CSV file: %s", e)
+            records = {}
+        self.records = records
+        self._status_counts = Counter(dict.fromkeys(_STATUSES, 0))
+        self._status_counts[STATUS_PENDING] = len(records)
+        return records
 
     def write_record(self, record: Dict[str, str]) -> bool:
         """Write a single record to CSV file."""
         try:
-            file_exists = self.csv_path.exists()
-            with open(self.csv_path, 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['uid', 'version', 'nft_id', 'offer'])
-                if not file_exists:
-                    writer.writeheader()
-                writer.writerow(record)
+            self._get_writer().writerow(_record_row(record))
+            # Flush so the row is on disk even if the run is interrupted
+            self._fh.flush()
             return True
         except Exception as e:
             logging.error(f"Failed to write record: {e}")
@@ -61,25 +269,26 @@ class CSVHandler:
         return self.records.get(uid)
 
     def update_record_status(self, uid: str, status: str, message: str = "") -> None:
-        """Update record status."""
-        if uid in self.records:
-            self.records[uid].status = status
-            self.records[uid].message = message
+        """Update record status.
+
+        Raises:
+            ValueError: If status is not one of the STATUS_* values
+        """
+        interned = _STATUSES.get(status)
+        if interned is None:
+            raise ValueError(f"Invalid record status {status!r}, expected one of: {', '.join(_STATUSES)}")
+        record = self.records.get(uid)
+        if record is not None:
+            self._status_counts[record.status] -= 1
+            self._status_counts[interned] += 1
+            record.status = interned
+            record.message = message
             # No progress saving needed
 
     def get_summary(self) -> dict:
         """Get processing summary."""
-        summary = {
-            'total': len(self.records),
-            'pending': 0,
-            'success': 0,
-            'failed': 0,
-            'skipped': 0
-        }
-        
-        for record in self.records.values():
-            summary[record.status] += 1
-            
+        summary = {'total': len(self.records)}
+        summary.update(self._status_counts)
         return summary
 
     def write_records(self, records: List[Dict[str, str]]) -> bool:
@@ -92,16 +301,10 @@ class CSVHandler:
             bool: True if all writes successful
         """
         try:
-            # Check if file exists to determine if header needed
-            file_exists = os.path.exists(self.csv_path)
-            
-            with open(self.csv_path, 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['uid', 'version', 'nft_id', 'offer'])
-                
-                if not file_exists:
-                    writer.writeheader()
-                    
-                writer.writerows(records)
+            self._get_writer().writerows(map(_record_row, records))
+            # One flush and sync for the whole batch, so it is durable once this returns
+            self._fh.flush()
+            _fdatasync(self._fh.fileno())
             return True
             
         except Exception as e:
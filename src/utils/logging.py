@@ -1,15 +1,43 @@
 """Logging configuration."""
 
 import logging
+import logging.handlers
 import sys
 from pathlib import Path
 
+_SEPARATOR = "=" * 80
 
-class StripNewlinesFilter(logging.Filter):
-    """Filter to remove leading/trailing newlines from log messages."""
-    def filter(self, record):
-        record.msg = record.msg.strip()
-        return True
+# Set once setup_logging has installed the handlers
+_SETUP_DONE = False
+
+# Batching file handler installed by setup_logging
+_FILE_BATCH = None
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that reuses the formatted timestamp for records within the same second."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_second = None
+        self._last_time = None
+
+    def formatTime(self, record, datefmt=None):
+        # Without datefmt the default format includes milliseconds, so it cannot be reused
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._last_second:
+            self._last_time = super().formatTime(record, datefmt)
+            self._last_second = second
+        return self._last_time
+
+
+class StripNewlinesFormatter(CachedTimeFormatter):
+    """Formatter that removes leading/trailing newlines from log messages."""
+    def formatMessage(self, record):
+        # record.message is rebuilt by every Formatter.format, so other handlers are unaffected
+        record.message = record.message.strip()
+        return super().formatMessage(record)
 
 
 class ImmediateHandler(logging.StreamHandler):
@@ -19,8 +47,48 @@ class ImmediateHandler(logging.StreamHandler):
         self.flush()
 
 
+class DeferredFlushFileHandler(logging.FileHandler):
+    """File handler that writes without flushing, leaving the flush to the caller."""
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingHandler(logging.handlers.MemoryHandler):
+    """Buffer records and hand them to the target in batches, flushing it once per batch.
+
+    A batch is written when the buffer is full, on a WARNING or higher
+    record and when logging shuts down.
+    """
+    def __init__(self, target, capacity=512):
+        super().__init__(capacity, flushLevel=logging.WARNING, target=target, flushOnClose=True)
+
+    def flush(self):
+        super().flush()
+        if self.target:
+            self.target.flush()
+
+    def close(self):
+        # MemoryHandler.close clears self.target, so keep it to close afterwards
+        target = self.target
+        super().close()
+        if target:
+            target.close()
+
+
 def setup_logging():
-    """Configure logging for both console and file output."""
+    """Configure logging for both console and file output, once per process."""
+    global _SETUP_DONE, _FILE_BATCH
+    if _SETUP_DONE:
+        return
+    _SETUP_DONE = True
+
     # Create logs directory if it doesn't exist
     log_dir = Path('output')
     log_dir.mkdir(exist_ok=True)
@@ -34,23 +102,30 @@ def setup_logging():
     console_formatter = logging.Formatter('%(message)s')
     console_handler.setFormatter(console_formatter)
     
-    # File handler - DEBUG level, detailed format
-    file_handler = ImmediateHandler(open('output/operations.log', 'a', encoding='utf-8'))
+    # File handler - DEBUG level, detailed format, written in batches. The console
+    # stays immediate so messages appear before input() prompts.
+    file_handler = DeferredFlushFileHandler('output/operations.log', mode='a', encoding='utf-8', delay=True)
     file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
+    file_formatter = StripNewlinesFormatter(
         '[%(asctime)s] %(levelname)s: %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     file_handler.setFormatter(file_formatter)
-    file_handler.addFilter(StripNewlinesFilter())
     
     # Clear any existing handlers
     logging.root.handlers = []
     
     # Add handlers
     logging.root.addHandler(console_handler)
-    logging.root.addHandler(file_handler)
+    _FILE_BATCH = BatchingHandler(file_handler)
+    logging.root.addHandler(_FILE_BATCH)
 
     # Add session separator to log file
-    logging.info("="*80)
+    logging.info(_SEPARATOR)
     logging.info("Starting new NFC operation session")
+
+
+def flush_log_file():
+    """Write any batched log records to the log file, e.g. before blocking on input."""
+    if _FILE_BATCH is not None:
+        _FILE_BATCH.flush()